@@ -5,78 +5,476 @@ Provides endpoints for frame analysis and health checks.
 """
 
 from flask import Flask, request, jsonify
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 import cv2
 import numpy as np
 import mediapipe as mp
+import orjson
 import math
 import base64
-from io import BytesIO
+import hashlib
 from PIL import Image
 import logging
+import os
+import queue
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+
+try:
+    from numba import njit
+except ImportError:  # Run the geometry kernels as plain Python without Numba
+    def njit(*args, **kwargs):
+        return lambda func: func
+
+
+class ORJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes with orjson, including NumPy values."""
+    
+    def dumps(self, obj, **kwargs):
+        """Serialize obj to a JSON string."""
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+    
+    def loads(self, s, **kwargs):
+        """Deserialize a JSON string or bytes."""
+        return orjson.loads(s)
+
 
 # Initialize Flask application with CORS support
 app = Flask(__name__)
+app.json = ORJSONProvider(app)  # jsonify() responses are encoded by orjson
+app.config['MAX_CONTENT_LENGTH'] = 16 * 1024 * 1024  # Reject uploads over 16 MB
 CORS(app, resources={
-    r"/analyze": {"origins": ["https://realfy-oasis.vercel.app/"]}
+    r"/analyze": {"origins": ["https://realfy-oasis.vercel.app/"]},
+    r"/analyze_batch": {"origins": ["https://realfy-oasis.vercel.app/"]}
 })  # Enable Cross-Origin Resource Sharing for all routes
 
-# Configure logging for better debugging and monitoring
+# Development mode, accepting the same FLASK_DEBUG spellings as Flask
+DEBUG = os.environ.get('FLASK_DEBUG', '0').lower() in ('1', 'true', 'yes')
+
+# Configure logging for better debugging and monitoring; per-request
+# messages are only emitted in debug mode
 logging.basicConfig(
-    level=logging.INFO,
+    level=logging.DEBUG if DEBUG else logging.WARNING,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
 
-# Initialize MediaPipe Pose solution with optimal parameters
+# MediaPipe Pose solution handles
 mp_pose = mp.solutions.pose
 mp_drawing = mp.solutions.drawing_utils
-pose = mp_pose.Pose(
-    static_image_mode=False,      # Better for video streams
-    model_complexity=1,          # Balanced accuracy and performance
-    smooth_landmarks=True,       # Smoother landmark tracking
-    min_detection_confidence=0.5,  # Minimum confidence to consider detection valid
-    min_tracking_confidence=0.5    # Minimum confidence to continue tracking
+
+# Long-side pixel limit for frames fed to MediaPipe (BlazePose runs at 256x256)
+MP_INPUT_LONG_SIDE = 480
+
+# BlazePose variant: 0 = lite (default, ~2x faster), 1 = full, 2 = heavy.
+# Only the full model ships with mediapipe; lite and heavy are downloaded
+# into site-packages on first use (gunicorn fetches it in on_starting)
+MP_MODEL_COMPLEXITY = int(os.environ.get('MP_MODEL_COMPLEXITY', '0'))
+
+# Maximum MediaPipe Pose instances (loaded models) per analyzer; matches the
+# gunicorn thread count so each request thread can hold one
+POSE_POOL_SIZE = int(os.environ.get('POSE_POOL_SIZE', '2'))
+
+# Threads (and Pose instances) per worker for /analyze_batch; kept small and
+# fixed because gunicorn already runs one worker per core
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', '2'))
+
+# Largest number of frames accepted by a single /analyze_batch request
+MAX_BATCH_FRAMES = 32
+
+
+def create_pose(static_image_mode=False):
+    """
+    Create a MediaPipe Pose instance with optimal parameters.
+    
+    The instance is warmed up on a blank frame so TFLite delegate and graph
+    initialization happen here instead of on the first real client frame.
+    
+    Args:
+        static_image_mode: Treat frames as unrelated images instead of a
+            tracked video stream (used for order-independent batches)
+    
+    Returns:
+        mp_pose.Pose: Ready-to-use Pose instance
+    """
+    pose = mp_pose.Pose(
+        static_image_mode=static_image_mode,  # False is better for video streams
+        model_complexity=MP_MODEL_COMPLEXITY,  # Lite model suffices for coarse thresholds
+        smooth_landmarks=True,       # Smoother landmark tracking
+        min_detection_confidence=0.5,  # Minimum confidence to consider detection valid
+        min_tracking_confidence=0.5    # Minimum confidence to continue tracking
+    )
+    try:
+        pose.process(np.zeros((256, 256, 3), dtype=np.uint8))
+    except Exception as e:
+        logger.warning(f"Pose warmup failed: {e}")
+    return pose
+
+
+# Integer landmark indices baked into the compiled geometry kernels
+LEFT_EAR = int(mp_pose.PoseLandmark.LEFT_EAR)
+RIGHT_EAR = int(mp_pose.PoseLandmark.RIGHT_EAR)
+LEFT_SHOULDER = int(mp_pose.PoseLandmark.LEFT_SHOULDER)
+RIGHT_SHOULDER = int(mp_pose.PoseLandmark.RIGHT_SHOULDER)
+LEFT_HIP = int(mp_pose.PoseLandmark.LEFT_HIP)
+RIGHT_HIP = int(mp_pose.PoseLandmark.RIGHT_HIP)
+LEFT_KNEE = int(mp_pose.PoseLandmark.LEFT_KNEE)
+RIGHT_KNEE = int(mp_pose.PoseLandmark.RIGHT_KNEE)
+LEFT_ANKLE = int(mp_pose.PoseLandmark.LEFT_ANKLE)
+RIGHT_ANKLE = int(mp_pose.PoseLandmark.RIGHT_ANKLE)
+
+# Issue bits reported by the desk and squat kernels
+FORWARD_HEAD = 1
+SLOUCHING = 2
+UNEVEN_SHOULDERS = 4
+KNEES_OVER_TOES = 1
+ROUNDED_BACK = 2
+POOR_KNEE_TRACKING = 4
+
+# Landmarks each analysis depends on; below MIN_VISIBILITY the subject is
+# treated as occluded and the analysis is skipped
+MIN_VISIBILITY = 0.5
+DESK_LANDMARKS = np.array(
+    [LEFT_EAR, RIGHT_EAR, LEFT_SHOULDER, RIGHT_SHOULDER, LEFT_HIP, RIGHT_HIP],
+    dtype=np.intp
 )
+SQUAT_LANDMARKS = np.array(
+    [LEFT_SHOULDER, LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE, LEFT_ANKLE, RIGHT_ANKLE],
+    dtype=np.intp
+)
+EXERCISE_LANDMARKS = np.array([LEFT_HIP, RIGHT_HIP, LEFT_KNEE, RIGHT_KNEE], dtype=np.intp)
+
+
+def _issue_table(messages):
+    """
+    Precompute the issue list for every bitmask value.
+
+    Args:
+        messages: Issue messages ordered by bit position
+
+    Returns:
+        tuple: Message tuple for each mask, indexed by the mask itself
+    """
+    return tuple(
+        tuple(message for bit, message in enumerate(messages) if mask >> bit & 1)
+        for mask in range(1 << len(messages))
+    )
+
+
+DESK_ISSUES = _issue_table((
+    "Forward head posture detected",
+    "Slouching detected",
+    "Uneven shoulders"
+))
+SQUAT_ISSUES = _issue_table((
+    "Knees extending beyond toes",
+    "Rounded back detected",
+    "Poor knee tracking"
+))
+
+
+def _landmarks_to_array(landmarks):
+    """
+    Pack MediaPipe landmarks into a single (33, 3) array of normalized x, y
+    and visibility.
+
+    Args:
+        landmarks: MediaPipe pose landmarks
+
+    Returns:
+        np.ndarray: float32 array indexed by PoseLandmark value
+    """
+    return np.array([[lm.x, lm.y, lm.visibility] for lm in landmarks], dtype=np.float32)
+
+
+@njit(cache=True, fastmath=True, inline='always')
+def _calc_angle(ax, ay, bx, by, cx, cy):
+    """
+    Calculate the angle at vertex b between points a, b and c.
+
+    Returns:
+        float: Angle in degrees, or 0 for degenerate (zero-length) vectors
+    """
+    # Calculate vectors from vertex point
+    bax = ax - bx
+    bay = ay - by
+    bcx = cx - bx
+    bcy = cy - by
+
+    # Calculate cosine angle using dot product and magnitudes
+    norm = math.hypot(bax, bay) * math.hypot(bcx, bcy)
+    if norm == 0.0:
+        return 0.0
+    cosine_angle = (bax * bcx + bay * bcy) / norm
+    return math.degrees(math.acos(max(-1.0, min(1.0, cosine_angle))))
+
+
+@njit(cache=True, fastmath=True)
+def _analyze_desk(lm):
+    """
+    Desk sitting kernel over a (33, 3) float32 landmark array.
+
+    Returns:
+        tuple: (issue bitmask, [neck_angle, shoulder_hip_horizontal_diff])
+    """
+    # Calculate average positions for symmetry analysis
+    ear_x = (lm[LEFT_EAR, 0] + lm[RIGHT_EAR, 0]) / 2
+    ear_y = (lm[LEFT_EAR, 1] + lm[RIGHT_EAR, 1]) / 2
+    shoulder_x = (lm[LEFT_SHOULDER, 0] + lm[RIGHT_SHOULDER, 0]) / 2
+    shoulder_y = (lm[LEFT_SHOULDER, 1] + lm[RIGHT_SHOULDER, 1]) / 2
+    hip_x = (lm[LEFT_HIP, 0] + lm[RIGHT_HIP, 0]) / 2
+    hip_y = (lm[LEFT_HIP, 1] + lm[RIGHT_HIP, 1]) / 2
+
+    # Neck angle (forward head posture, ideal is ~180°), shoulder-hip
+    # alignment (slouching) and shoulder level (uneven shoulders)
+    neck_angle = _calc_angle(ear_x, ear_y, shoulder_x, shoulder_y, hip_x, hip_y)
+    shoulder_hip_horizontal_diff = abs(shoulder_x - hip_x)
+    shoulder_level_diff = abs(lm[LEFT_SHOULDER, 1] - lm[RIGHT_SHOULDER, 1])
+
+    # Branchless threshold checks folded into the issue bitmask
+    issues = (
+        FORWARD_HEAD * (neck_angle < 150)
+        | SLOUCHING * (shoulder_hip_horizontal_diff > 0.1)
+        | UNEVEN_SHOULDERS * (shoulder_level_diff > 0.05)
+    )
+
+    details = np.empty(2, dtype=np.float32)
+    details[0] = neck_angle
+    details[1] = shoulder_hip_horizontal_diff
+    return issues, details
+
+
+@njit(cache=True, fastmath=True)
+def _analyze_squat(lm):
+    """
+    Squat kernel over a (33, 3) float32 landmark array.
+
+    Returns:
+        tuple: (issue bitmask, [back_angle])
+    """
+    # Knee-ankle horizontal offsets for toe alignment and knee tracking
+    left_knee_dx = lm[LEFT_KNEE, 0] - lm[LEFT_ANKLE, 0]
+    right_knee_dx = lm[RIGHT_KNEE, 0] - lm[RIGHT_ANKLE, 0]
+
+    # Back angle analysis (prevent rounded back)
+    back_angle = _calc_angle(
+        lm[LEFT_SHOULDER, 0], lm[LEFT_SHOULDER, 1],
+        lm[LEFT_HIP, 0], lm[LEFT_HIP, 1],
+        lm[LEFT_KNEE, 0], lm[LEFT_KNEE, 1]
+    )
+
+    # Branchless threshold checks folded into the issue bitmask
+    issues = (
+        KNEES_OVER_TOES * ((left_knee_dx > 0) | (right_knee_dx > 0))
+        | ROUNDED_BACK * (back_angle < 150)
+        | POOR_KNEE_TRACKING * ((abs(left_knee_dx) >= 0.1) | (abs(right_knee_dx) >= 0.1))
+    )
+
+    details = np.empty(1, dtype=np.float32)
+    details[0] = back_angle
+    return issues, details
+
+
+@njit(cache=True, fastmath=True)
+def _is_squat(lm):
+    """Classify a (33, 3) float32 landmark array as squat by knee-hip angle."""
+    knee_hip_angle = _calc_angle(
+        lm[LEFT_KNEE, 0], lm[LEFT_KNEE, 1],
+        lm[LEFT_HIP, 0], lm[LEFT_HIP, 1],
+        lm[RIGHT_HIP, 0], lm[RIGHT_HIP, 1]
+    )
+    return knee_hip_angle < 120
+
+
+# Compile the kernels at import so the first request does not pay for it
+_dummy_landmarks = np.zeros((33, 3), dtype=np.float32)
+_analyze_desk(_dummy_landmarks)
+_analyze_squat(_dummy_landmarks)
+_is_squat(_dummy_landmarks)
+del _dummy_landmarks
+
+
+class BufferPool:
+    """Thread-safe pool of reusable uint8 frame buffers keyed by shape."""
+    
+    def __init__(self, max_per_shape=8):
+        """
+        Args:
+            max_per_shape: Maximum number of idle buffers kept per shape
+        """
+        self._pools = {}
+        self._max_per_shape = max_per_shape
+    
+    def _pool(self, shape):
+        """Return the idle-buffer queue for a shape, creating it if needed."""
+        pool = self._pools.get(shape)
+        if pool is None:
+            pool = self._pools.setdefault(shape, queue.Queue(self._max_per_shape))
+        return pool
+    
+    def acquire(self, shape):
+        """Take an idle buffer of the given shape, allocating one if none is free."""
+        try:
+            return self._pool(shape).get_nowait()
+        except queue.Empty:
+            return np.empty(shape, dtype=np.uint8)
+    
+    def release(self, buf):
+        """Return a buffer to the pool; it is dropped if the pool is full."""
+        buf.flags.writeable = True
+        try:
+            self._pool(buf.shape).put_nowait(buf)
+        except queue.Full:
+            pass
+
+
+class ResultCache:
+    """Thread-safe LRU cache of analysis results keyed by frame content hash."""
+    
+    def __init__(self, maxsize=256):
+        """
+        Args:
+            maxsize: Maximum number of cached results
+        """
+        self._entries = OrderedDict()
+        self._maxsize = maxsize
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def key(image_bytes):
+        """Compute the cache key for raw uploaded frame bytes."""
+        return hashlib.blake2b(image_bytes, digest_size=16).digest()
+    
+    def get(self, key):
+        """Return the cached result for a key, or None on a miss."""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+            return result
+    
+    def put(self, key, result):
+        """Store a result, evicting the least recently used entry when full."""
+        with self._lock:
+            self._entries[key] = result
+            self._entries.move_to_end(key)
+            if len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+
+class PosePool:
+    """
+    Thread-safe, bounded pool of MediaPipe Pose instances.
+    
+    Pose is not thread-safe, so every in-flight frame checks out its own
+    instance. Idle instances are reused by whichever thread runs next, so
+    servers that spawn a thread per request do not rebuild the model. At
+    most `max_size` instances ever exist; further checkouts wait for one
+    to be returned instead of loading another model.
+    """
+    
+    def __init__(self, factory=create_pose, max_size=POSE_POOL_SIZE):
+        """
+        Args:
+            factory: Callable returning a new, warmed-up Pose instance
+            max_size: Maximum number of Pose instances kept by the pool
+        """
+        self._factory = factory
+        self._max_size = max_size
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._created = 0
+        self._lock = threading.Lock()
+    
+    def _create(self):
+        """Create a new instance, or return None once max_size exist."""
+        with self._lock:
+            if self._created >= self._max_size:
+                return None
+            self._created += 1
+        try:
+            return self._factory()
+        except Exception:
+            with self._lock:
+                self._created -= 1
+            raise
+    
+    @contextmanager
+    def checkout(self):
+        """Borrow a Pose instance for the duration of a with-block."""
+        with self._slots:
+            try:
+                pose = self._idle.get_nowait()
+            except queue.Empty:
+                pose = self._create()
+                if pose is None:  # Limit reached while a warmup was in flight
+                    pose = self._idle.get()
+            try:
+                yield pose
+            finally:
+                self._idle.put(pose)
+    
+    def warmup(self, count):
+        """Pre-create instances until `count` (capped at max_size) are idle."""
+        for _ in range(min(count, self._max_size) - self._idle.qsize()):
+            pose = self._create()
+            if pose is None:
+                break
+            self._idle.put(pose)
 
 
 class PostureAnalyzer:
     """Core posture analysis engine using MediaPipe pose detection."""
     
-    def __init__(self):
-        """Initialize with MediaPipe Pose instance."""
-        self.pose = pose
+    def __init__(self, static_image_mode=False, max_poses=POSE_POOL_SIZE):
+        """
+        Initialize MediaPipe Pose and frame buffer pools.
         
+        Args:
+            static_image_mode: Passed to every Pose instance the analyzer creates
+            max_poses: Maximum number of Pose instances the analyzer keeps
+        """
+        self._poses = PosePool(
+            partial(create_pose, static_image_mode=static_image_mode), max_poses
+        )
+        self._buffers = BufferPool()
+        self._pipeline = None  # (input key, specialized pipeline) for the last frame
+    
+    def warmup(self, count=1):
+        """Make `count` warmed-up Pose instances available before serving."""
+        self._poses.warmup(count)
+    
     def calculate_angle(self, point1, point2, point3):
         """
-        Calculate the angle between three points using vector math.
+        Calculate the angle between three points using scalar math.
+        
+        Pure ``math`` module fallback for callers holding landmark objects;
+        it avoids both NumPy and the Numba dispatcher's per-call overhead.
         
         Args:
-            point1: First point (landmark)
-            point2: Vertex point (landmark)
-            point3: Third point (landmark)
+            point1: First point (object with .x and .y, e.g. a landmark)
+            point2: Vertex point
+            point3: Third point
             
         Returns:
             float: Angle in degrees between the points
         """
-        try:
-            # Convert landmarks to numpy arrays for vector operations
-            a = np.array([point1.x, point1.y])
-            b = np.array([point2.x, point2.y])
-            c = np.array([point3.x, point3.y])
-            
-            # Calculate vectors from vertex point
-            ba = a - b
-            bc = c - b
-            
-            # Calculate cosine angle using dot product and magnitudes
-            cosine_angle = np.dot(ba, bc) / (np.linalg.norm(ba) * np.linalg.norm(bc))
-            angle = np.arccos(np.clip(cosine_angle, -1.0, 1.0))
-            
-            return np.degrees(angle)
-        except Exception as e:
-            logger.warning(f"Angle calculation error: {e}")
-            return 0  # Return 0 if calculation fails
+        # Calculate vectors from vertex point
+        bax = point1.x - point2.x
+        bay = point1.y - point2.y
+        bcx = point3.x - point2.x
+        bcy = point3.y - point2.y
+        
+        # Calculate cosine angle using dot product and magnitudes
+        norm = math.hypot(bax, bay) * math.hypot(bcx, bcy)
+        if norm == 0.0:
+            return 0.0
+        cosine_angle = (bax * bcx + bay * bcy) / norm
+        return math.degrees(math.acos(max(-1.0, min(1.0, cosine_angle))))
     
     def analyze_desk_posture(self, landmarks):
         """
@@ -88,62 +486,27 @@ class PostureAnalyzer:
         - Uneven shoulders
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: (33, 3) float32 landmark array (x, y, visibility)
             
         Returns:
             tuple: (list of issues, dict of detailed measurements)
         """
-        issues = []
-        details = {}
-        
-        # Get relevant landmarks using MediaPipe's enum
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        left_ear = landmarks[mp_pose.PoseLandmark.LEFT_EAR]
-        right_ear = landmarks[mp_pose.PoseLandmark.RIGHT_EAR]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP]
-        
-        # Calculate average positions for symmetry analysis
-        avg_shoulder = [
-            (left_shoulder.x + right_shoulder.x) / 2,
-            (left_shoulder.y + right_shoulder.y) / 2
-        ]
-        avg_ear = [
-            (left_ear.x + right_ear.x) / 2,
-            (left_ear.y + right_ear.y) / 2
-        ]
-        avg_hip = [
-            (left_hip.x + right_hip.x) / 2,
-            (left_hip.y + right_hip.y) / 2
-        ]
-        
-        # Create point objects for angle calculation
-        ear_point = type('Point', (), {'x': avg_ear[0], 'y': avg_ear[1]})()
-        shoulder_point = type('Point', (), {'x': avg_shoulder[0], 'y': avg_shoulder[1]})()
-        hip_point = type('Point', (), {'x': avg_hip[0], 'y': avg_hip[1]})()
-        
-        # Neck angle analysis (forward head posture)
-        neck_angle = self.calculate_angle(ear_point, shoulder_point, hip_point)
-        details['neck_angle'] = neck_angle
-        
-        # Posture thresholds based on ergonomic studies
-        if neck_angle < 150:  # Ideal is ~180° (straight alignment)
-            issues.append("Forward head posture detected")
-        
-        # Shoulder-hip alignment (slouching detection)
-        shoulder_hip_horizontal_diff = abs(avg_shoulder[0] - avg_hip[0])
-        if shoulder_hip_horizontal_diff > 0.1:  # Threshold for significant slouching
-            issues.append("Slouching detected")
-        
-        # Shoulder level check (uneven shoulders)
-        shoulder_level_diff = abs(left_shoulder.y - right_shoulder.y)
-        if shoulder_level_diff > 0.05:  # Threshold for noticeable unevenness
-            issues.append("Uneven shoulders")
-        
-        # Additional metrics for detailed feedback
-        details['back_angle'] = 180 - neck_angle  # Complementary angle
-        details['shoulder_alignment'] = shoulder_hip_horizontal_diff < 0.1
+        # Skip the geometry entirely when key landmarks are occluded
+        visibility = float(landmarks[DESK_LANDMARKS, 2].min())
+        if visibility < MIN_VISIBILITY:
+            return [], {'low_visibility': True, 'visibility': visibility}
+        
+        mask, metrics = _analyze_desk(landmarks)
+        neck_angle = float(metrics[0])
+        
+        issues = list(DESK_ISSUES[mask])
+        
+        details = {
+            'neck_angle': neck_angle,
+            'back_angle': 180 - neck_angle,  # Complementary angle
+            'shoulder_alignment': not (mask & SLOUCHING),
+            'visibility': visibility
+        }
         
         return issues, details
     
@@ -157,50 +520,26 @@ class PostureAnalyzer:
         - Poor knee tracking
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: (33, 3) float32 landmark array (x, y, visibility)
             
         Returns:
             tuple: (list of issues, dict of detailed measurements)
         """
-        issues = []
-        details = {}
-        
-        # Get lower body landmarks
-        left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE]
-        left_ankle = landmarks[mp_pose.PoseLandmark.LEFT_ANKLE]
-        right_ankle = landmarks[mp_pose.PoseLandmark.RIGHT_ANKLE]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP]
-        left_shoulder = landmarks[mp_pose.PoseLandmark.LEFT_SHOULDER]
-        right_shoulder = landmarks[mp_pose.PoseLandmark.RIGHT_SHOULDER]
-        
-        # Knee-toe alignment check (proper squat form)
-        left_knee_over_toe = left_knee.x > left_ankle.x
-        right_knee_over_toe = right_knee.x > right_ankle.x
-        
-        if left_knee_over_toe or right_knee_over_toe:
-            issues.append("Knees extending beyond toes")
-        
-        details['knee_toe_alignment'] = not (left_knee_over_toe or right_knee_over_toe)
-        
-        # Back angle analysis (prevent rounded back)
-        back_angle = self.calculate_angle(
-            left_shoulder, left_hip, left_knee
-        )
-        details['back_angle'] = back_angle
-        
-        if back_angle < 150:  # Threshold for proper back alignment
-            issues.append("Rounded back detected")
+        # Skip the geometry entirely when key landmarks are occluded
+        visibility = float(landmarks[SQUAT_LANDMARKS, 2].min())
+        if visibility < MIN_VISIBILITY:
+            return [], {'low_visibility': True, 'visibility': visibility}
         
-        # Knee tracking (alignment during movement)
-        knee_tracking_left = abs(left_knee.x - left_ankle.x) < 0.1
-        knee_tracking_right = abs(right_knee.x - right_ankle.x) < 0.1
+        mask, metrics = _analyze_squat(landmarks)
         
-        if not (knee_tracking_left and knee_tracking_right):
-            issues.append("Poor knee tracking")
+        issues = list(SQUAT_ISSUES[mask])
         
-        details['knee_tracking'] = knee_tracking_left and knee_tracking_right
+        details = {
+            'knee_toe_alignment': not (mask & KNEES_OVER_TOES),
+            'back_angle': float(metrics[0]),
+            'knee_tracking': not (mask & POOR_KNEE_TRACKING),
+            'visibility': visibility
+        }
         
         return issues, details
     
@@ -209,44 +548,127 @@ class PostureAnalyzer:
         Determine whether the subject is performing squats or desk sitting.
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: (33, 3) float32 landmark array (x, y, visibility)
             
         Returns:
             str: 'squat' or 'desk_sitting'
         """
-        left_knee = landmarks[mp_pose.PoseLandmark.LEFT_KNEE]
-        right_knee = landmarks[mp_pose.PoseLandmark.RIGHT_KNEE]
-        left_hip = landmarks[mp_pose.PoseLandmark.LEFT_HIP]
-        right_hip = landmarks[mp_pose.PoseLandmark.RIGHT_HIP]
-        
-        # Calculate knee-hip angle to determine body position
-        knee_hip_angle = self.calculate_angle(
-            left_knee, left_hip, right_hip
-        )
+        # Hidden hips/knees (e.g. behind a desk) cannot indicate a squat
+        if landmarks[EXERCISE_LANDMARKS, 2].min() < MIN_VISIBILITY:
+            return "desk_sitting"
+        return "squat" if _is_squat(landmarks) else "desk_sitting"
+    
+    def _process(self, rgb_image):
+        """Run MediaPipe Pose on an RGB uint8 frame."""
+        rgb_image.flags.writeable = False  # Lets MediaPipe skip its own copy
+        with self._poses.checkout() as pose:
+            return pose.process(rgb_image)
+    
+    def _build_pipeline(self, shape, is_bgr):
+        """
+        Build the preprocessing and inference function for one input format.
+        
+        Resize target and buffer shapes are fixed up front, so each frame of
+        a constant-resolution stream goes straight through resize and color
+        conversion into pooled buffers without re-deciding either step.
+        
+        Args:
+            shape: Input image shape (height, width, 3)
+            is_bgr: Whether the input needs BGR -> RGB conversion
+            
+        Returns:
+            callable: Function mapping an input image to MediaPipe results
+        """
+        buffers = self._buffers
+        process = self._process
+        
+        # Downscale large frames; landmarks are normalized so results are unaffected
+        height, width = shape[:2]
+        scale = MP_INPUT_LONG_SIDE / max(height, width)
+        
+        if scale >= 1:
+            if not is_bgr:
+                return process
+            
+            def convert(image):
+                rgb_image = buffers.acquire(shape)
+                try:
+                    cv2.cvtColor(image, cv2.COLOR_BGR2RGB, dst=rgb_image)
+                    return process(rgb_image)
+                finally:
+                    buffers.release(rgb_image)
+            return convert
+        
+        dsize = (max(1, round(width * scale)), max(1, round(height * scale)))
+        small_shape = (dsize[1], dsize[0], 3)
+        
+        if not is_bgr:
+            def resize(image):
+                small = buffers.acquire(small_shape)
+                try:
+                    cv2.resize(image, dsize, dst=small, interpolation=cv2.INTER_AREA)
+                    return process(small)
+                finally:
+                    buffers.release(small)
+            return resize
+        
+        def resize_convert(image):
+            small = buffers.acquire(small_shape)
+            rgb_image = buffers.acquire(small_shape)
+            try:
+                cv2.resize(image, dsize, dst=small, interpolation=cv2.INTER_AREA)
+                cv2.cvtColor(small, cv2.COLOR_BGR2RGB, dst=rgb_image)
+                return process(rgb_image)
+            finally:
+                buffers.release(small)
+                buffers.release(rgb_image)
+        return resize_convert
+    
+    @staticmethod
+    def error_result(error):
+        """
+        Log a frame analysis failure and build the matching error result.
         
-        # Classification based on angle thresholds
-        return "squat" if knee_hip_angle < 120 else "desk_sitting"
+        Args:
+            error: Exception raised while analyzing the frame
+            
+        Returns:
+            dict: Analysis result reporting the error
+        """
+        logger.error(f"Frame analysis error: {str(error)}", exc_info=error)
+        return {
+            'is_bad_posture': False,
+            'message': f'Analysis error: {str(error)}',
+            'confidence': 0.0,
+            'details': {}
+        }
     
-    def analyze_frame(self, image):
+    def analyze_frame(self, image, raise_errors=False):
         """
         Main analysis pipeline for processing a single frame.
         
         Args:
-            image: Input image (PIL Image or file-like object)
+            image: Decoded BGR image as a uint8 ndarray (cv2.imdecode output)
+                or a PIL Image, which is used as RGB without color conversion
+            raise_errors: Re-raise analysis failures instead of returning
+                an error result, so callers can tell them apart
             
         Returns:
             dict: Analysis results including posture assessment and metrics
         """
         try:
-            # Convert PIL Image to OpenCV format if needed
-            if isinstance(image, Image.Image):
-                image = cv2.cvtColor(np.array(image), cv2.COLOR_RGB2BGR)
-            
-            # MediaPipe requires RGB format
-            rgb_image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            # PIL already decodes to RGB, so only OpenCV frames need converting
+            is_bgr = not isinstance(image, Image.Image)
+            if not is_bgr:
+                image = np.asarray(image if image.mode == 'RGB' else image.convert('RGB'))
             
-            # Process image with MediaPipe Pose
-            results = self.pose.process(rgb_image)
+            # Reuse the pipeline specialized for this input shape, rebuilding it
+            # only when the resolution or color order changes
+            key = (image.shape, is_bgr)
+            pipeline = self._pipeline
+            if pipeline is None or pipeline[0] != key:
+                pipeline = self._pipeline = (key, self._build_pipeline(*key))
+            results = pipeline[1](image)
             
             # Early return if no person detected
             if not results.pose_landmarks:
@@ -257,7 +679,8 @@ class PostureAnalyzer:
                     'details': {}
                 }
             
-            landmarks = results.pose_landmarks.landmark
+            # Extract all landmark coordinates once for the analyzers
+            landmarks = _landmarks_to_array(results.pose_landmarks.landmark)
             
             # Determine exercise type and analyze accordingly
             exercise_type = self.detect_exercise_type(landmarks)
@@ -267,6 +690,17 @@ class PostureAnalyzer:
             else:
                 issues, details = self.analyze_desk_posture(landmarks)
             
+            # Do not judge posture from occluded landmarks
+            if details.get('low_visibility'):
+                return {
+                    'is_bad_posture': False,
+                    'message': 'Low confidence: key body landmarks not clearly visible',
+                    'confidence': details['visibility'],
+                    'exercise_type': exercise_type,
+                    'details': details,
+                    'issues': issues
+                }
+            
             # Compose results
             is_bad_posture = len(issues) > 0
             message = (
@@ -276,6 +710,7 @@ class PostureAnalyzer:
             
             # Confidence calculation based on number of issues
             confidence = max(0.5, 1.0 - (len(issues) * 0.2))  # Minimum 50% confidence
+            confidence *= details['visibility']  # Scale by landmark visibility
             
             return {
                 'is_bad_posture': is_bad_posture,
@@ -287,17 +722,52 @@ class PostureAnalyzer:
             }
             
         except Exception as e:
-            logger.error(f"Frame analysis error: {str(e)}", exc_info=True)
-            return {
-                'is_bad_posture': False,
-                'message': f'Analysis error: {str(e)}',
-                'confidence': 0.0,
-                'details': {}
-            }
+            if raise_errors:
+                raise
+            return self.error_result(e)
 
 
-# Initialize the analyzer instance
+# Initialize the analyzer instance and the repeated-frame result cache.
+# Models load lazily on first use; servers call warmup() before serving
 analyzer = PostureAnalyzer()
+result_cache = ResultCache()
+
+# Batch uploads are analyzed as independent images across a thread pool;
+# MediaPipe releases the GIL during inference so frames run in parallel
+batch_analyzer = PostureAnalyzer(static_image_mode=True, max_poses=BATCH_WORKERS)
+batch_executor = ThreadPoolExecutor(max_workers=BATCH_WORKERS)
+
+
+def decode_frame(image_bytes):
+    """
+    Decode uploaded image bytes straight into a BGR ndarray.
+    
+    Returns:
+        np.ndarray or None: Decoded image, or None if the data is not an image
+    """
+    # cv2.imdecode raises instead of returning None on an empty buffer
+    if not image_bytes:
+        return None
+    try:
+        return cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error:
+        return None
+
+
+def analyze_batch_frame(image_bytes):
+    """Decode and analyze one frame of a batch upload; never raises."""
+    try:
+        image = decode_frame(image_bytes)
+        if image is None:
+            return {
+                'error': 'Invalid image data',
+                'is_bad_posture': False,
+                'message': 'Analysis failed',
+                'confidence': 0.0
+            }
+        return batch_analyzer.analyze_frame(image)
+    except Exception as e:
+        return PostureAnalyzer.error_result(e)
 
 
 @app.route('/', methods=['GET'])
@@ -308,6 +778,7 @@ def health_check():
         'message': 'Posture Detection API is running',
         'endpoints': {
             'analyze': '/analyze (POST)',
+            'analyze_batch': '/analyze_batch (POST)',
             'health': '/ (GET)'
         }
     })
@@ -331,13 +802,26 @@ def analyze_posture():
         
         frame_file = request.files['frame']
         
-        # Read and convert image
         image_bytes = frame_file.read()
-        image = Image.open(BytesIO(image_bytes))
         
-        # Perform analysis
-        result = analyzer.analyze_frame(image)
-        logger.info(f"Analysis completed: {result.get('message')}")
+        # Identical frames (demos, client reconnects) reuse the cached analysis
+        cache_key = ResultCache.key(image_bytes)
+        result = result_cache.get(cache_key)
+        
+        if result is None:
+            image = decode_frame(image_bytes)
+            if image is None:
+                logger.warning("Uploaded frame could not be decoded")
+                return jsonify({'error': 'Invalid image data'}), 400
+            
+            # Perform analysis; only successful results are cached so a
+            # transient failure does not stick to this frame
+            try:
+                result = analyzer.analyze_frame(image, raise_errors=True)
+                result_cache.put(cache_key, result)
+            except Exception as e:
+                result = PostureAnalyzer.error_result(e)
+        logger.debug("Analysis completed: %s", result.get('message'))
         
         return jsonify(result)
         
@@ -351,6 +835,43 @@ def analyze_posture():
         }), 500
 
 
+@app.route('/analyze_batch', methods=['POST'])
+def analyze_batch():
+    """
+    API endpoint for analyzing a buffered sequence of frames.
+    
+    Accepts multiple image files ('frames') and analyzes them in parallel.
+    
+    Returns:
+        JSON: List of analysis results in upload order, or error message
+    """
+    try:
+        frames = request.files.getlist('frames')
+        if not frames:
+            logger.warning("No frames provided in batch request")
+            return jsonify({'error': 'No frames provided'}), 400
+        if len(frames) > MAX_BATCH_FRAMES:
+            logger.warning("Batch request with %d frames rejected", len(frames))
+            return jsonify({
+                'error': f'Too many frames (maximum {MAX_BATCH_FRAMES})'
+            }), 413
+        
+        # Read uploads on the request thread; only decoding and inference fan out
+        results = list(batch_executor.map(
+            analyze_batch_frame, [frame.read() for frame in frames]
+        ))
+        logger.debug("Batch analysis completed: %d frames", len(results))
+        
+        return jsonify(results)
+        
+    except Exception as e:
+        logger.error(f"Batch analysis endpoint error: {str(e)}", exc_info=True)
+        return jsonify({
+            'error': str(e),
+            'message': 'Batch analysis failed'
+        }), 500
+
+
 @app.route('/test', methods=['GET'])
 def test_endpoint():
     """Test endpoint for verification and demonstration."""
@@ -371,9 +892,17 @@ def test_endpoint():
 
 
 if __name__ == '__main__':
-    # Start the Flask development server
+    # Load models up front, skipping the reloader's watcher process which
+    # never serves requests; under gunicorn this happens in post_worker_init
+    if not DEBUG or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        analyzer.warmup()
+        batch_analyzer.warmup()
+    
+    # Start the Flask development server; production runs under gunicorn
     app.run(
-        debug=True,      # Enable debug mode for development
-        host='0.0.0.0',  # Make accessible on all network interfaces
-        port=5000        # Standard Flask port
-    )
\ No newline at end of file
+        debug=DEBUG,          # Opt in with FLASK_DEBUG=1
+        use_reloader=DEBUG,   # Reloader forks a second process with its own models
+        threaded=True,        # Serve frames concurrently on pooled Pose instances
+        host='0.0.0.0',       # Make accessible on all network interfaces
+        port=5000             # Standard Flask port
+    )
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration for the Posture Detection API.
+Usage: gunicorn -c gunicorn.conf.py app:app
+"""
+
+import os
+
+# Bind to the port provided by the hosting platform (Render sets $PORT)
+bind = f"0.0.0.0:{os.environ.get('PORT', '5000')}"
+
+# One process per core so CPU-bound MediaPipe inference runs in parallel.
+# Each worker keeps threads + BATCH_WORKERS (default 2 + 2) MediaPipe models
+# resident, and os.cpu_count() reports host cores rather than container CPU
+# limits, so set WEB_CONCURRENCY deliberately on memory-limited hosts
+workers = int(os.environ.get('WEB_CONCURRENCY', os.cpu_count() or 1))
+
+# Threaded workers; each request thread checks a MediaPipe Pose out of the
+# worker's bounded pool (POSE_POOL_SIZE in app.py, one per thread by default)
+worker_class = 'gthread'
+threads = 2
+
+# Import the app in every worker rather than the master, so each worker
+# builds its own TFLite interpreter instead of sharing one across fork()
+preload_app = False
+
+
+def on_starting(server):
+    """
+    Fetch the configured BlazePose model once in the master process.
+    
+    The mediapipe wheel only bundles the full model; the lite (0) and heavy
+    (2) variants are downloaded into site-packages on first use. Doing it
+    here, before any worker forks, keeps workers from racing to write the
+    same file. Requires network access and a writable site-packages.
+    """
+    import mediapipe as mp
+    model_complexity = int(os.environ.get('MP_MODEL_COMPLEXITY', '0'))
+    mp.solutions.pose.Pose(model_complexity=model_complexity).close()
+
+
+def post_worker_init(worker):
+    """Warm MediaPipe Pose instances for request and batch threads."""
+    from app import BATCH_WORKERS, analyzer, batch_analyzer
+    analyzer.warmup(worker.cfg.threads)
+    batch_analyzer.warmup(BATCH_WORKERS)
@@ -1,2 +1,2 @@
 #!/bin/bash
-gunicorn --bind 0.0.0.0:$PORT app:app
\ No newline at end of file
+gunicorn -c gunicorn.conf.py app:app
\ No newline at end of file